@@ -1,18 +1,26 @@
 
-from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks, Request
+from fastapi.responses import JSONResponse
+from anyio import from_thread
+from sqlalchemy import select, insert, func, literal_column
+from sqlalchemy.orm import Session, selectinload
 from pydantic import BaseModel
 from typing import Optional, List
-from datetime import datetime, timedelta
+import asyncio
+import logging
 import uuid
+import redis
 
-from app.db.session import get_db
-from app.db.models import Run, Video, Template
+from app.db.session import get_db, AsyncSessionLocal
+from app.core.cache import redis_client, async_redis_client, youtube_cache_key, CACHE_TTL_SECONDS
+from app.db.models import Run
 from app.services.youtube_collector import YouTubeCollector
 from app.services.ai_templates import SentimentTemplates
 
 router = APIRouter()
 
+logger = logging.getLogger(__name__)
+
 # --- Pydantic Models ---
 class CollectRequest(BaseModel):
     keyword: str
@@ -53,129 +61,180 @@ class StatusResponse(BaseModel):
     error_message: Optional[str] = None
 
 # --- Background Task ---
+# Executed by the arq worker (app/worker.py), or in-process via BackgroundTasks
+# when no Redis broker is configured.
 async def process_youtube_collection(run_id: uuid.UUID, keyword: str):
-    # Create a fresh session for the background task
-    from app.db.session import SessionLocal
-    background_db = SessionLocal()
-    
-    try:
-        collector = YouTubeCollector(background_db, run_id)
-        success = await collector.collect(keyword)
-        
-        if success:
-            # Generate Templates
-            templater = SentimentTemplates(background_db, run_id)
-            templater.generate()
+    # Create a fresh async session for the background task
+    async with AsyncSessionLocal() as background_db:
+        try:
+            collector = YouTubeCollector(background_db, run_id)
+            success = await collector.collect(keyword)
             
-    except Exception as e:
-        # Update run status to failed if not already handled
-        run = background_db.query(Run).filter(Run.id == run_id).first()
-        if run:
-            run.status = "failed"
-            run.error_message = str(e)
-            background_db.commit()
-    finally:
-        background_db.close()
+            if success:
+                # Generate Templates
+                titles = [v['title'] for v in collector.all_videos]
+                templater = SentimentTemplates(background_db, run_id, titles)
+                await templater.generate()
+
+                # Run is complete (videos + templates): point the keyword cache at it
+                # so /collect/youtube can skip the SQL probe
+                await _cache_run_id(keyword, run_id)
+                
+        except (Exception, asyncio.CancelledError) as e:
+            # Update run status to failed if not already handled.
+            # CancelledError: arq job_timeout hit; don't leave the run "running".
+            await background_db.rollback()
+            result = await background_db.execute(select(Run).where(Run.id == run_id))
+            run = result.scalar_one_or_none()
+            if run:
+                run.status = "failed"
+                run.error_message = str(e) or "Job cancelled (timeout)"
+                await background_db.commit()
+            if isinstance(e, asyncio.CancelledError):
+                raise
+
+async def _cache_run_id(keyword: str, run_id: uuid.UUID):
+    # Best-effort: the SQL probe still finds the run if Redis is unavailable
+    if not async_redis_client:
+        return
+    try:
+        await async_redis_client.setex(youtube_cache_key(keyword), CACHE_TTL_SECONDS, str(run_id))
+    except redis.RedisError as e:
+        logger.warning(f"Could not write run cache key: {e}")
 
 # --- Endpoints ---
 
 @router.post("/collect/youtube", response_model=CollectResponse)
 def collect_youtube(
     request: CollectRequest, 
+    http_request: Request,
     background_tasks: BackgroundTasks,
     db: Session = Depends(get_db)
 ):
     # 1. Check Cache
     if not request.force_refresh:
-        twenty_four_hours_ago = datetime.utcnow() - timedelta(hours=24)
-        cached_run = db.query(Run).filter(
-            Run.keyword == request.keyword,
-            Run.status == "success",
-            Run.finished_at >= twenty_four_hours_ago
-        ).order_by(Run.finished_at.desc()).first()
+        cached_run = None
+
+        # Fast path: Redis points at the latest successful run for this keyword
+        cached_run_id = None
+        if redis_client:
+            try:
+                cached_run_id = redis_client.get(youtube_cache_key(request.keyword))
+            except redis.RedisError as e:
+                logger.warning(f"Could not read run cache key: {e}")
+        if cached_run_id:
+            # Same status filter as the SQL probe; anything else falls through to it
+            cached_run = _run_with_results(db).filter(
+                Run.id == uuid.UUID(cached_run_id),
+                Run.status == "success"
+            ).first()
+
+        if not cached_run:
+            # Cutoff computed by Postgres; finished_at is stored as naive UTC
+            twenty_four_hours_ago = func.timezone("utc", func.now()) - literal_column("INTERVAL '24 HOURS'")
+            cached_run = _run_with_results(db).filter(
+                Run.keyword == request.keyword,
+                Run.status == "success",
+                Run.finished_at >= twenty_four_hours_ago
+            ).order_by(Run.finished_at.desc()).first()
 
         if cached_run:
-            status_data = _get_status_response(cached_run, db)
             return CollectResponse(
                 job_id=cached_run.id,
                 status="success",
                 cached=True,
-                result=status_data.dict()
+                result=_get_status_response(cached_run)
             )
 
-    # 2. Create New Run
-    new_run = Run(
-        keyword=request.keyword,
-        status="queued"
-    )
-    db.add(new_run)
+    # 2. Create New Run (id returned by the INSERT itself, no refresh round-trip)
+    new_run_id = db.execute(
+        insert(Run).values(keyword=request.keyword, status="queued").returning(Run.id)
+    ).scalar_one()
     db.commit()
-    db.refresh(new_run)
 
     # 3. Enqueue Background Task
-    background_tasks.add_task(process_youtube_collection, new_run.id, request.keyword)
+    arq_pool = getattr(http_request.app.state, "arq_pool", None)
+    enqueued = False
+    if arq_pool is not None:
+        try:
+            # Sync endpoint runs in a worker thread; hop back to the event loop to enqueue
+            from_thread.run(
+                arq_pool.enqueue_job,
+                "process_youtube_collection",
+                str(new_run_id),
+                request.keyword
+            )
+            enqueued = True
+        except Exception as e:
+            # Don't leave the run "queued" with no worker ever picking it up
+            logger.warning(f"Could not enqueue run {new_run_id}, running in-process: {e}")
+    if not enqueued:
+        background_tasks.add_task(process_youtube_collection, new_run_id, request.keyword)
 
     return CollectResponse(
-        job_id=new_run.id,
+        job_id=new_run_id,
         status="queued",
         cached=False
     )
 
-@router.get("/status/{job_id}", response_model=StatusResponse)
+# StatusResponse documents the payload; it's built as a plain dict and returned
+# as-is, skipping pydantic construction/revalidation on the hot path.
+@router.get("/status/{job_id}", response_model=None, responses={200: {"model": StatusResponse}})
 def get_status(job_id: uuid.UUID, db: Session = Depends(get_db)):
-    run = db.query(Run).filter(Run.id == job_id).first()
+    run = _run_with_results(db).filter(Run.id == job_id).first()
     if not run:
         raise HTTPException(status_code=404, detail="Job not found")
     
-    return _get_status_response(run, db)
-
-def _get_status_response(run: Run, db: Session) -> StatusResponse:
-    # Fetch videos
-    videos = db.query(Video).filter(Video.run_id == run.id).all()
-    templates = db.query(Template).filter(Template.run_id == run.id).all()
-
-    # Sort videos into categories
-    search_top = []
-    people_also_watched = []
-    related_fallback = []
-
-    for v in videos:
-        obj = VideoObject(
-            source=v.source_type,
-            rank=v.rank,
-            title=v.title,
-            channel_name=v.channel_name,
-            video_id=v.video_id,
-            video_url=v.video_url,
-            views_raw=v.views_raw,
-            views_num=v.views_num if v.views_num else 0,
-            collected_from=v.collected_from
-        )
-        if v.source_type == "search":
-            search_top.append(obj)
-        elif v.source_type == "people_also_watched":
-            people_also_watched.append(obj)
-        elif v.source_type == "related_fallback":
-            related_fallback.append(obj)
+    return JSONResponse(_get_status_response(run))
+
+def _run_with_results(db: Session):
+    # One query for the run + one IN (...) query each for videos and templates
+    return db.query(Run).options(
+        selectinload(Run.videos),
+        selectinload(Run.templates)
+    )
+
+def _get_status_response(run: Run) -> dict:
+    # Videos and templates are eager loaded by the caller (selectinload),
+    # videos already ordered by (source_type, rank) via the relationship.
+
+    # Split videos into categories
+    buckets = {"search": [], "people_also_watched": [], "related_fallback": []}
+
+    for v in run.videos:
+        bucket = buckets.get(v.source_type)
+        if bucket is None:
+            continue
+        bucket.append({
+            "source": v.source_type,
+            "rank": v.rank,
+            "title": v.title,
+            "channel_name": v.channel_name,
+            "video_id": v.video_id,
+            "video_url": v.video_url,
+            "views_raw": v.views_raw,
+            "views_num": v.views_num if v.views_num else 0,
+            "collected_from": v.collected_from
+        })
 
     # Templates
-    template_objs = [
-        TemplateObject(
-            template_text=t.template_text,
-            example_1=t.example_1,
-            example_2=t.example_2
-        ) for t in templates
+    templates = [
+        {
+            "template_text": t.template_text,
+            "example_1": t.example_1,
+            "example_2": t.example_2
+        } for t in run.templates
     ]
 
-    return StatusResponse(
-        job_id=run.id,
-        keyword=run.keyword,
-        status=run.status,
-        hl=run.hl,
-        gl=run.gl,
-        search_top=sorted(search_top, key=lambda x: x.rank),
-        people_also_watched_top=sorted(people_also_watched, key=lambda x: x.rank),
-        related_fallback_top=sorted(related_fallback, key=lambda x: x.rank),
-        templates=template_objs,
-        error_message=run.error_message
-    )
+    return {
+        "job_id": str(run.id),
+        "keyword": run.keyword,
+        "status": run.status,
+        "hl": run.hl,
+        "gl": run.gl,
+        "search_top": buckets["search"],
+        "people_also_watched_top": buckets["people_also_watched"],
+        "related_fallback_top": buckets["related_fallback"],
+        "templates": templates,
+        "error_message": run.error_message
+    }
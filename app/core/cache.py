@@ -0,0 +1,16 @@
+
+import redis
+import redis.asyncio as aioredis
+from app.core.config import settings
+
+# Matches the 24h freshness window used for cached runs
+CACHE_TTL_SECONDS = 24 * 60 * 60
+
+# Optional: without REDIS_URL both clients are None and callers skip caching.
+# Sync client for request handlers, async client for background jobs.
+redis_client = redis.Redis.from_url(settings.REDIS_URL, decode_responses=True) if settings.REDIS_URL else None
+async_redis_client = aioredis.Redis.from_url(settings.REDIS_URL, decode_responses=True) if settings.REDIS_URL else None
+
+def youtube_cache_key(keyword: str) -> str:
+    """Redis key pointing at the latest successful run id for a keyword."""
+    return f"cache:youtube:{keyword}"
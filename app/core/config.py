@@ -9,6 +9,11 @@ class Settings(BaseSettings):
     OPENAI_API_KEY: str
     OPENAI_BASE_URL: Optional[str] = None
     OPENAI_MODEL: str = "gpt-3.5-turbo"
+    # Redis broker for the arq worker; without it jobs run in-process (dev)
+    REDIS_URL: Optional[str] = None
+    WORKER_MAX_JOBS: int = 4
+    # Seconds; covers browser session setup, navigations and the LLM stream
+    WORKER_JOB_TIMEOUT: int = 900
 
     class Config:
         env_file = ".env"
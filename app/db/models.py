@@ -1,15 +1,19 @@
 
 import uuid
-from sqlalchemy import Column, String, Integer, BigInteger, DateTime, ForeignKey, Text
+from sqlalchemy import Column, String, Integer, BigInteger, DateTime, ForeignKey, Text, Index, text
 from sqlalchemy.orm import relationship
 from sqlalchemy.dialects.postgresql import UUID
 from datetime import datetime
 from app.db.session import Base
 
+# Primary keys: ids are still generated client-side (uuid4) because tables created
+# by older init_db() runs have no DB default and create_all() won't add one.
+# server_default (gen_random_uuid, built in since PG 13) covers fresh tables and raw SQL inserts.
+
 class Run(Base):
     __tablename__ = "runs"
 
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4, server_default=text("gen_random_uuid()"))
     keyword = Column(Text, nullable=False)
     hl = Column(String, default="id")
     gl = Column(String, default="ID")
@@ -18,13 +22,24 @@ class Run(Base):
     finished_at = Column(DateTime, nullable=True)
     error_message = Column(Text, nullable=True)
 
-    videos = relationship("Video", back_populates="run", cascade="all, delete-orphan")
+    videos = relationship(
+        "Video",
+        back_populates="run",
+        cascade="all, delete-orphan",
+        order_by="[Video.source_type, Video.rank]"
+    )
     templates = relationship("Template", back_populates="run", cascade="all, delete-orphan")
 
+# 24h cache probe: keyword + status equality, range/order on finished_at DESC
+Index("ix_runs_cache_probe", Run.keyword, Run.status, Run.finished_at.desc())
+
 class Video(Base):
     __tablename__ = "videos"
+    __table_args__ = (
+        Index("ix_videos_run_id_source_rank", "run_id", "source_type", "rank"),
+    )
 
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4, server_default=text("gen_random_uuid()"))
     run_id = Column(UUID(as_uuid=True), ForeignKey("runs.id"), nullable=False)
     
     source_type = Column(String, nullable=False) # search, people_also_watched, related_fallback
@@ -45,7 +60,7 @@ class Video(Base):
 class Template(Base):
     __tablename__ = "templates"
 
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4, server_default=text("gen_random_uuid()"))
     run_id = Column(UUID(as_uuid=True), ForeignKey("runs.id"), nullable=False)
     template_text = Column(Text, nullable=False)
     example_1 = Column(Text, nullable=True)
@@ -1,6 +1,9 @@
 
-from sqlalchemy import create_engine
+import uuid
+from sqlalchemy import create_engine, make_url
+from sqlalchemy.pool import NullPool
 from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from app.core.config import settings
 
 # Fix for SQLAlchemy 1.4+ (and 2.0) requiring postgresql:// scheme
@@ -8,9 +11,41 @@ database_url = settings.DATABASE_URL
 if database_url and database_url.startswith("postgres://"):
     database_url = database_url.replace("postgres://", "postgresql://", 1)
 
-engine = create_engine(database_url, pool_pre_ping=True)
+# Request-serving pool: short-lived sessions, sized for concurrent API workers
+engine = create_engine(
+    database_url,
+    pool_pre_ping=True,
+    pool_size=20,
+    max_overflow=40,
+    pool_recycle=1800
+)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async engine (asyncpg) for background jobs, so DB I/O doesn't block the event loop.
+# NullPool: long-running jobs open/close their own connection and never hold
+# slots from the request pool above.
+# asyncpg doesn't accept libpq's ?sslmode=..., it takes the same values as `ssl`.
+# Prepared statements are disabled/uniquely named so Supabase's transaction
+# pooler (pgbouncer, port 6543) works as well as direct/session-mode URLs.
+async_url = make_url(database_url).set(drivername="postgresql+asyncpg")
+async_connect_args = {
+    "statement_cache_size": 0,
+    "prepared_statement_cache_size": 0,
+    "prepared_statement_name_func": lambda: f"__asyncpg_{uuid.uuid4()}__",
+}
+if "sslmode" in async_url.query:
+    async_connect_args["ssl"] = async_url.query["sslmode"]
+    async_url = async_url.difference_update_query(["sslmode"])
+
+async_engine = create_async_engine(
+    async_url,
+    poolclass=NullPool,
+    connect_args=async_connect_args
+)
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine, autoflush=False, expire_on_commit=False
+)
+
 Base = declarative_base()
 
 def get_db():
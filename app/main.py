@@ -2,26 +2,43 @@
 from fastapi import FastAPI
 from app.api import collect
 from app.db.init_db import init_db
+from app.core.config import settings
+from arq import create_pool
+from arq.connections import RedisSettings
 from contextlib import asynccontextmanager
 import traceback
 import sys
 
 # Global variable to store startup errors
 startup_error = None
+# Job queue (Redis) connection error; API keeps working on BackgroundTasks
+queue_error = None
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
-    global startup_error
+    global startup_error, queue_error
     try:
         init_db()
     except Exception as e:
         startup_error = e
         print(f"Startup error: {e}", file=sys.stderr)
         traceback.print_exc()
+
+    # Job queue (arq). Without REDIS_URL the API falls back to BackgroundTasks.
+    app.state.arq_pool = None
+    if settings.REDIS_URL:
+        try:
+            app.state.arq_pool = await create_pool(RedisSettings.from_dsn(settings.REDIS_URL))
+        except Exception as e:
+            queue_error = e
+            print(f"Job queue unavailable, using in-process tasks: {e}", file=sys.stderr)
+            traceback.print_exc()
     
     yield
     # Shutdown
+    if app.state.arq_pool is not None:
+        await app.state.arq_pool.close()
 
 app = FastAPI(
     title="YouTube Winning Pattern Detector",
@@ -51,4 +68,11 @@ def health_check():
             "error": str(startup_error),
             "traceback": traceback.format_exc()
         }
+    if queue_error:
+        return {
+            "status": "degraded",
+            "db": "connected",
+            "queue": "unavailable",
+            "error": str(queue_error)
+        }
     return {"status": "ok", "db": "connected"}
@@ -69,3 +69,6 @@ class AgentBayService:
                     logger.info("AgentBay session deleted.")
                 except Exception as close_err:
                     logger.error(f"Error deleting session: {close_err}")
+
+# Shared instance: one AgentBay client (and its HTTP connection pool) per process
+agentbay_service = AgentBayService()
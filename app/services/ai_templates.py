@@ -1,30 +1,108 @@
 
-from openai import OpenAI
-from sqlalchemy.orm import Session
+import logging
+import httpx
+import redis
+from openai import AsyncOpenAI
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.config import settings
-from app.db.models import Run, Video, Template
+from app.core.cache import async_redis_client, CACHE_TTL_SECONDS
+from app.db.models import Template
+import hashlib
 import json
+import ijson
+from typing import List
+
+logger = logging.getLogger(__name__)
+
+# Module-level client so the keep-alive/TLS connection pool is reused across runs
+_openai_client = AsyncOpenAI(
+    api_key=settings.OPENAI_API_KEY,
+    base_url=settings.OPENAI_BASE_URL,
+    http_client=httpx.AsyncClient(limits=httpx.Limits(max_keepalive_connections=20))
+)
 
 class SentimentTemplates:
-    def __init__(self, db: Session, run_id: str):
+    def __init__(self, db: AsyncSession, run_id: str, titles: List[str]):
         self.db = db
         self.run_id = run_id
-        self.client = OpenAI(
-            api_key=settings.OPENAI_API_KEY,
-            base_url=settings.OPENAI_BASE_URL
-        )
+        self.titles = titles
+        self.client = _openai_client
 
-    def generate(self):
+    async def generate(self):
         """
         Generates 10 reusable title templates based on collected videos.
         """
-        # Fetch videos for this run
-        videos = self.db.query(Video).filter(Video.run_id == self.run_id).all()
-        
-        if not videos:
+        # Titles come straight from the collector, no need to re-read videos
+        titles = self.titles
+        if not titles:
+            return
+
+        # Same title set -> same prompt; reuse a previous LLM response if cached
+        cache_key = "tpl:" + hashlib.sha256("\n".join(sorted(titles)).encode()).hexdigest()
+        cached = await self._cache_get(cache_key)
+
+        templates_data = self._decode_cached(cached)
+        if templates_data is None:
+            try:
+                templates_data = await self._stream_templates(titles)
+            except ijson.JSONError:
+                # Fallback or log error
+                return
+
+            # Cache the parsed list (not the raw text) so hits decode exactly
+            # what a fresh run produced; never cache an empty result
+            if templates_data:
+                await self._cache_set(cache_key, json.dumps(templates_data))
+
+        rows = [
+            dict(
+                run_id=self.run_id,
+                template_text=t.get("template_text"),
+                example_1=t.get("example_1"),
+                example_2=t.get("example_2")
+            ) for t in templates_data
+        ]
+        if rows:
+            await self.db.execute(insert(Template), rows)
+            await self.db.commit()
+
+    @staticmethod
+    def _decode_cached(cached):
+        # Anything but a list of template objects (e.g. older raw entries) is a miss
+        if not cached:
+            return None
+        try:
+            data = json.loads(cached)
+        except json.JSONDecodeError:
+            return None
+        if not isinstance(data, list) or not all(isinstance(t, dict) for t in data):
+            return None
+        return data
+
+    async def _cache_get(self, key):
+        # Cache is optional: a Redis error just means calling the LLM
+        if not async_redis_client:
+            return None
+        try:
+            return await async_redis_client.get(key)
+        except redis.RedisError as e:
+            logger.warning(f"Template cache read failed: {e}")
+            return None
+
+    async def _cache_set(self, key, value):
+        if not async_redis_client:
             return
+        try:
+            await async_redis_client.setex(key, CACHE_TTL_SECONDS, value)
+        except redis.RedisError as e:
+            logger.warning(f"Template cache write failed: {e}")
 
-        titles = [v.title for v in videos]
+    async def _stream_templates(self, titles):
+        """
+        Streams the LLM response and parses template objects as they complete.
+        Returns the list of template dicts (top-level array items only).
+        """
         titles_str = "\n".join([f"- {t}" for t in titles])
 
         prompt = f"""
@@ -38,30 +116,31 @@ class SentimentTemplates:
         Do not include markdown formatting.
         """
 
-        response = self.client.chat.completions.create(
+        stream = await self.client.chat.completions.create(
             model=settings.OPENAI_MODEL,
             messages=[
                 {"role": "system", "content": "You are a YouTube expert. Output valid JSON only."},
                 {"role": "user", "content": prompt}
             ],
-            temperature=0.7
+            temperature=0.7,
+            stream=True
         )
 
-        content = response.choices[0].message.content
-        try:
-            templates_data = json.loads(content)
-            
-            for t in templates_data:
-                template = Template(
-                    run_id=self.run_id,
-                    template_text=t.get("template_text"),
-                    example_1=t.get("example_1"),
-                    example_2=t.get("example_2")
-                )
-                self.db.add(template)
-            
-            self.db.commit()
+        # Incremental parser: each completed array item lands in `parsed`
+        # while later tokens are still arriving.
+        parsed = ijson.sendable_list()
+        parser = ijson.items_coro(parsed, "item", use_float=True)
+        templates_data = []
 
-        except json.JSONDecodeError:
-            # Fallback or log error
-            pass
+        async for chunk in stream:
+            delta = chunk.choices[0].delta.content if chunk.choices else None
+            if not delta:
+                continue
+            parser.send(delta.encode())
+            templates_data.extend(t for t in parsed if isinstance(t, dict))
+            del parsed[:]
+
+        parser.close()
+        templates_data.extend(t for t in parsed if isinstance(t, dict))
+
+        return templates_data
@@ -1,10 +1,13 @@
 
 import logging
 import asyncio
+import json
+import re
 from typing import List, Optional
-from sqlalchemy.orm import Session
+from sqlalchemy import select, insert
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.db.models import Run, Video
-from app.services.agentbay import AgentBayService
+from app.services.agentbay import agentbay_service
 from app.utils.views_parser import parse_views_id
 from urllib.parse import quote_plus
 from datetime import datetime
@@ -12,11 +15,66 @@ from playwright.async_api import async_playwright
 
 logger = logging.getLogger(__name__)
 
+# Raw view count embedded in the watch page's initial player/data JSON
+_VIEW_COUNT_RE = re.compile(r'"viewCount":"(\d+)"')
+
+# Initial data blob inlined in the search results HTML
+_INITIAL_DATA_RE = re.compile(r'var ytInitialData = (\{.*?\});\s*</script>', re.DOTALL)
+
+# Resources the scraper never needs; aborted to keep watch page loads light.
+# Only these URLs are routed: every routed request round-trips to this process
+# over CDP, so a catch-all "**/*" route would slow down everything else.
+_BLOCKED_URL_PATTERNS = (
+    "https://i.ytimg.com/**",   # thumbnails
+    "https://yt3.ggpht.com/**", # channel avatars
+    "**/*.woff2",
+    "**/*.css",
+)
+
+async def _abort_route(route):
+    await route.abort()
+
+def _text(node) -> str:
+    """Reads a ytInitialData text node ({simpleText} or {runs: [...]})."""
+    if not node:
+        return ''
+    if 'simpleText' in node:
+        return node['simpleText']
+    return ''.join(r.get('text', '') for r in node.get('runs', []))
+
+# Extracts up to `limit` video cards matching `selector`.
+# Returns list of dicts: {title, url, id, channel, views}
+_EXTRACT_JS = """
+    ({selector, limit}) => {
+        const results = [];
+        const cards = document.querySelectorAll(selector);
+        for (let i = 0; i < cards.length && i < limit; i++) {
+            const card = cards[i];
+            const titleEl = card.querySelector('#video-title');
+            const channelEl = card.querySelector('#channel-info #text') || card.querySelector('.ytd-channel-name #text');
+            const viewsEl = card.querySelector('#metadata-line span:nth-child(1)'); // risky selector
+            const linkEl = card.querySelector('a#thumbnail');
+            
+            if (titleEl && linkEl) {
+                results.push({
+                    title: titleEl.innerText.trim(),
+                    url: linkEl.href,
+                    id: linkEl.href.split('v=')[1]?.split('&')[0],
+                    channel: channelEl ? channelEl.innerText.trim() : '',
+                    views: viewsEl ? viewsEl.innerText.trim() : ''
+                });
+            }
+        }
+        return results;
+    }
+"""
+
 class YouTubeCollector:
-    def __init__(self, db: Session, run_id: str):
+    def __init__(self, db: AsyncSession, run_id: str):
         self.db = db
         self.run_id = run_id
-        self.agent_service = AgentBayService()
+        self.agent_service = agentbay_service
+        self.all_videos = [] # Video rows for this run, bulk inserted once at the end of collect
 
     async def collect(self, keyword: str):
         """
@@ -24,11 +82,11 @@ class YouTubeCollector:
         """
         logger.info(f"Starting collection for run {self.run_id} with keyword '{keyword}'")
         
-        # Update Run status to running
-        run = self.db.query(Run).filter(Run.id == self.run_id).first()
-        if run:
-            run.status = "running"
-            self.db.commit()
+        # Load the run once; status updates below mutate this instance
+        result = await self.db.execute(select(Run).where(Run.id == self.run_id))
+        run = result.scalar_one()
+        run.status = "running"
+        await self.db.commit()
 
         try:
             # Start AgentBay Session -> Get CDP URL
@@ -42,27 +100,30 @@ class YouTubeCollector:
                     # But often connect_over_cdp gives a context. Let's follow docs.
                     context = browser.contexts[0] if browser.contexts else await browser.new_context()
                     page = await context.new_page()
+                    for pattern in _BLOCKED_URL_PATTERNS:
+                        await page.route(pattern, _abort_route)
 
                     videos_collected = [] # List of dicts for fallback logic
                     
                     # 1. Search
                     encoded_keyword = quote_plus(keyword)
                     search_url = f"https://www.youtube.com/results?search_query={encoded_keyword}&hl=id&gl=ID"
-                    logger.info(f"Navigating to {search_url}")
-                    await page.goto(search_url, wait_until="domcontentloaded")
-                    
-                    # Wait for results
-                    await page.wait_for_selector('ytd-video-renderer', timeout=15000)
 
                     # 2. Extract Top 2 Search Results
-                    logger.info("Extracting search results...")
-                    search_results = await self._extract_videos(page, selector='ytd-video-renderer', limit=2)
-                    for i, vid in enumerate(search_results):
-                        # If views missing, visit page (handled in _enrich_video if needed, 
-                        # but for speed we try to get it from card)
-                        if not vid.get('views'):
-                            vid = await self._enrich_video_views(page, vid)
+                    # Fast path: read ytInitialData from the raw HTML, no rendering
+                    logger.info(f"Fetching {search_url}")
+                    search_results = await self._fetch_search_results(context, search_url, limit=2)
+                    if not search_results:
+                        logger.info(f"ytInitialData unavailable, navigating to {search_url}")
+                        await page.goto(search_url, wait_until="domcontentloaded")
                         
+                        # Wait for results
+                        await page.wait_for_selector('ytd-video-renderer', timeout=15000)
+                        search_results = await self._extract_videos(page, selector='ytd-video-renderer', limit=2)
+
+                    # Views come from the card when possible; missing ones are fetched concurrently
+                    await self._enrich_missing_views(page, search_results)
+                    for i, vid in enumerate(search_results):
                         self._save_video(vid, source="search", rank=i+1, collected_from="search")
                         videos_collected.append(vid)
 
@@ -89,67 +150,87 @@ class YouTubeCollector:
                                 await page.wait_for_selector('ytd-watch-next-secondary-results-renderer', timeout=15000)
                                 
                                 related = await self._extract_videos(page, selector='ytd-compact-video-renderer', limit=2)
+                                await self._enrich_missing_views(page, related)
                                 for i, vid in enumerate(related):
-                                    if not vid.get('views'):
-                                         vid = await self._enrich_video_views(page, vid)
                                     self._save_video(vid, source="related_fallback", rank=i+1, collected_from="watch_page")
 
                     await browser.close() # Close Playwright connection
 
+            # Persist all collected videos in one round-trip
+            if self.all_videos:
+                await self.db.execute(insert(Video), self.all_videos)
+
             # Update Run status to success
-            run = self.db.query(Run).filter(Run.id == self.run_id).first()
             run.status = "success"
             run.finished_at = datetime.utcnow()
-            self.db.commit()
+            await self.db.commit()
             return True
 
-        except Exception as e:
-            logger.error(f"Collection failed: {e}")
-            run = self.db.query(Run).filter(Run.id == self.run_id).first()
+        except (Exception, asyncio.CancelledError) as e:
+            logger.error(f"Collection failed: {e!r}")
+            await self.db.rollback()
             run.status = "failed"
-            run.error_message = str(e)
+            run.error_message = str(e) or "Job cancelled (timeout)"
             run.finished_at = datetime.utcnow()
-            self.db.commit()
+            await self.db.commit()
+            if isinstance(e, asyncio.CancelledError):
+                raise
             return False
 
+    async def _fetch_search_results(self, context, search_url, limit=2):
+        """
+        Extracts the top search results from the ytInitialData JSON in the search page HTML.
+        Returns the same dict shape as _extract_videos, or [] if the payload can't be read.
+        """
+        try:
+            resp = await context.request.get(search_url)
+            match = _INITIAL_DATA_RE.search(await resp.text())
+            if not match:
+                return []
+            data = json.loads(match.group(1))
+            sections = (data["contents"]["twoColumnSearchResultsRenderer"]
+                        ["primaryContents"]["sectionListRenderer"]["contents"])
+        except Exception as e:
+            logger.warning(f"Could not read ytInitialData: {e}")
+            return []
+
+        results = []
+        for section in sections:
+            for item in section.get("itemSectionRenderer", {}).get("contents", []):
+                renderer = item.get("videoRenderer")
+                if not renderer or not renderer.get("videoId"):
+                    continue
+                video_id = renderer["videoId"]
+                results.append({
+                    'title': _text(renderer.get('title')),
+                    'url': f"https://www.youtube.com/watch?v={video_id}",
+                    'id': video_id,
+                    'channel': _text(renderer.get('ownerText')),
+                    'views': _text(renderer.get('viewCountText'))
+                })
+                if len(results) >= limit:
+                    return results
+        return results
+
     async def _extract_videos(self, page, selector, limit=2):
         """
         Generic video extractor from a list of elements.
         """
-        # Script to extract data from multiple elements
-        # We pass the selector and limit to the browser context
-        # Return list of dicts: {title, url, views, channel, id}
-        
-        # JS evaluation is best for bulk extraction
-        return await page.evaluate(f"""
-            () => {{
-                const results = [];
-                const cards = document.querySelectorAll('{selector}');
-                for (let i = 0; i < cards.length && i < {limit}; i++) {{
-                    const card = cards[i];
-                    const titleEl = card.querySelector('#video-title');
-                    const channelEl = card.querySelector('#channel-info #text') || card.querySelector('.ytd-channel-name #text');
-                    const viewsEl = card.querySelector('#metadata-line span:nth-child(1)'); // risky selector
-                    const linkEl = card.querySelector('a#thumbnail');
-                    
-                    if (titleEl && linkEl) {{
-                        results.push({{
-                            title: titleEl.innerText.trim(),
-                            url: linkEl.href,
-                            id: linkEl.href.split('v=')[1]?.split('&')[0],
-                            channel: channelEl ? channelEl.innerText.trim() : '',
-                            views: viewsEl ? viewsEl.innerText.trim() : ''
-                        }});
-                    }}
-                }}
-                return results;
-            }}
-        """)
+        # JS evaluation is best for bulk extraction; selector/limit are passed as an argument
+        return await page.evaluate(_EXTRACT_JS, {"selector": selector, "limit": limit})
+
+    async def _enrich_missing_views(self, page, videos):
+        """
+        Enriches all videos without views in parallel (dicts are updated in place).
+        """
+        missing = [v for v in videos if not v.get('views')]
+        if missing:
+            await asyncio.gather(*(self._enrich_video_views(page, v) for v in missing))
 
     async def _enrich_video_views(self, page, video_data):
         """
-        If views are missing, go to video page and extract.
-        Note: This is expensive (new navigation).
+        If views are missing, fetch the watch page HTML and read viewCount.
+        Uses the browser context's request API (shares cookies, no tab, no rendering).
         """
         if video_data.get('views'):
             return video_data
@@ -159,29 +240,11 @@ class YouTubeCollector:
             return video_data
 
         try:
-             # We need a new page or navigate current? 
-             # For safety/simplicity let's assume we can navigate current, but that destroys state.
-             # Actually, if we are looping, we can't easily navigate away and back without losing list.
-             # Better to open a new page/tab if possible, OR just skip for MVP if too complex.
-             # Given "Non-aggressive", maybe we skip enrichment if it requires complex tab management?
-             # But req says: "If views are missing... open video watch page".
-             
-             # AgentBay/Playwright supports multiple pages.
-             context = page.context
-             new_page = await context.new_page()
-             await new_page.goto(url, wait_until="domcontentloaded")
-             
-             # specific selector for views on watch page
-             # "1.2M views" usually in #info-text or #count
-             views = await new_page.evaluate("""
-                () => {
-                    const el = document.querySelector('#info-text span:first-child') || document.querySelector('.view-count');
-                    return el ? el.innerText.trim() : '';
-                }
-             """)
-             video_data['views'] = views
-             await new_page.close()
-             
+            resp = await page.context.request.get(url)
+            match = _VIEW_COUNT_RE.search(await resp.text())
+            if match:
+                video_data['views'] = match.group(1)
+            
         except Exception:
             pass # Fail silently on enrichment
             
@@ -191,10 +254,8 @@ class YouTubeCollector:
         views_raw = video_data.get('views', '')
         views_num = parse_views_id(views_raw)
         
-        # Re-query DB to ensure session is active
-        # (Usually passed session is good, but in long async, sometimes needed)
-        
-        video = Video(
+        # Buffered here, written with a single bulk insert in collect()
+        self.all_videos.append(dict(
             run_id=self.run_id,
             source_type=source,
             rank=rank,
@@ -205,6 +266,4 @@ class YouTubeCollector:
             views_raw=views_raw,
             views_num=views_num,
             collected_from=collected_from
-        )
-        self.db.add(video)
-        self.db.commit()
+        ))
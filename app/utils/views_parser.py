@@ -1,6 +1,13 @@
 
 import re
 
+# Number (with Indonesian separators) optionally followed by a unit suffix.
+# \b keeps the first letter of a following word ("kali", "menonton") from counting as a unit.
+_VIEWS_RE = re.compile(r"([\d.,]+)\s*(?:(jt|rb|m|k)\b)?")
+
+# jt/rb = juta/ribu (Indonesian), m/k = English just in case
+_MULT = {"jt": 1_000_000, "rb": 1_000, "m": 1_000_000, "k": 1_000, None: 1}
+
 def parse_views_id(views_str: str) -> int:
     """
     Parses Indonesian YouTube view counts to integer.
@@ -12,44 +19,18 @@ def parse_views_id(views_str: str) -> int:
     """
     if not views_str:
         return 0
-    
-    # Normalize: lowercase, remove "x ditonton", "views", etc. keep numbers, commas, dots, letters
-    clean_str = views_str.lower().replace("x ditonton", "").replace("views", "").strip()
-    
-    # Check for multiplier
-    multiplier = 1
-    if "jt" in clean_str:
-        multiplier = 1_000_000
-        clean_str = clean_str.replace("jt", "").strip()
-    elif "rb" in clean_str:
-        multiplier = 1_000
-        clean_str = clean_str.replace("rb", "").strip()
-    elif "m" in clean_str: # Millions in english just in case
-        multiplier = 1_000_000
-        clean_str = clean_str.replace("m", "").strip()
-    elif "k" in clean_str: # Thousands in english just in case
-        multiplier = 1_000
-        clean_str = clean_str.replace("k", "").strip()
-        
+
+    m = _VIEWS_RE.search(views_str.lower())
+    if not m:
+        return 0
+
+    num, unit = m.groups()
+
     # Handle Java/Indonesian number formatting
     # "1,2" (decimal comma) -> 1.2
     # "1.234" (thousand separator dot) -> 1234
-    
-    # If it contains both dot and comma, assume standard Indonesian: 1.234,56 (unlikely for views, usually 1,2 jt)
-    # Most common patterns:
-    # 1,2 -> 1.2
-    # 1.200 -> 1200
-    
     try:
-        if "," in clean_str:
-            clean_str = clean_str.replace(".", "") # Remove thousand separators if any mixed (rare)
-            clean_str = clean_str.replace(",", ".") # Convert decimal comma to dot
-            num = float(clean_str)
-        else:
-            # removing dots as thousands separator
-            clean_str = clean_str.replace(".", "")
-            num = float(clean_str)
-            
-        return int(num * multiplier)
+        num = num.replace(".", "").replace(",", ".")
+        return int(float(num) * _MULT[unit])
     except ValueError:
         return 0
@@ -0,0 +1,16 @@
+
+import uuid
+from arq.connections import RedisSettings
+from app.core.config import settings
+from app.api.collect import process_youtube_collection as run_youtube_collection
+
+# Run with: arq app.worker.WorkerSettings
+
+async def process_youtube_collection(ctx, run_id: str, keyword: str):
+    await run_youtube_collection(uuid.UUID(run_id), keyword)
+
+class WorkerSettings:
+    functions = [process_youtube_collection]
+    redis_settings = RedisSettings.from_dsn(settings.REDIS_URL) if settings.REDIS_URL else RedisSettings()
+    max_jobs = settings.WORKER_MAX_JOBS
+    job_timeout = settings.WORKER_JOB_TIMEOUT
@@ -1,9 +1,9 @@
--- Enable UUID extension (usually enabled by default in Supabase, but good practice)
-create extension if not exists "uuid-ossp";
+-- gen_random_uuid() is built in on Postgres 13+; pgcrypto provides it on older versions
+create extension if not exists "pgcrypto";
 
 -- Table: runs
 create table runs (
-    id uuid primary key default uuid_generate_v4(),
+    id uuid primary key default gen_random_uuid(),
     keyword text not null,
     hl text default 'id',
     gl text default 'ID',
@@ -15,7 +15,7 @@ create table runs (
 
 -- Table: videos
 create table videos (
-    id uuid primary key default uuid_generate_v4(),
+    id uuid primary key default gen_random_uuid(),
     run_id uuid not null references runs(id) on delete cascade,
     source_type text not null,
     rank integer not null,
@@ -33,7 +33,7 @@ create table videos (
 
 -- Table: templates
 create table templates (
-    id uuid primary key default uuid_generate_v4(),
+    id uuid primary key default gen_random_uuid(),
     run_id uuid not null references runs(id) on delete cascade,
     template_text text not null,
     example_1 text,
@@ -41,6 +41,12 @@ create table templates (
 );
 
 -- Indexes for performance
-create index idx_runs_keyword on runs(keyword);
-create index idx_videos_run_id on videos(run_id);
-create index idx_templates_run_id on templates(run_id);
+-- (idempotent: safe to re-run on existing databases, create_all() won't add
+-- indexes to tables that already exist)
+create index if not exists ix_runs_cache_probe on runs(keyword, status, finished_at desc);
+create index if not exists ix_videos_run_id_source_rank on videos(run_id, source_type, rank);
+create index if not exists idx_templates_run_id on templates(run_id);
+
+-- Superseded by the composite indexes above (their leading columns)
+drop index if exists idx_runs_keyword;
+drop index if exists idx_videos_run_id;